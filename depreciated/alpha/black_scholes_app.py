@@ -1,4 +1,5 @@
 import streamlit as st
+import bisect
 import numpy as np
 import pandas as pd
 import seaborn as sns
@@ -16,6 +17,18 @@ STOCK_TICKERS = [
     "MSCI", "BA", "GE", "INTC", "IBM", "DIS", "GS", "WMT", "JPM", "BABA"
 ]
 
+# Sorted copy for bisect-based prefix suggestions
+SORTED_STOCK_TICKERS = tuple(sorted(STOCK_TICKERS))
+
+@st.cache_data
+def get_ticker_suggestions(prefix):
+    i = bisect.bisect_left(SORTED_STOCK_TICKERS, prefix)
+    suggestions = []
+    while i < len(SORTED_STOCK_TICKERS) and SORTED_STOCK_TICKERS[i].startswith(prefix):
+        suggestions.append(SORTED_STOCK_TICKERS[i])
+        i += 1
+    return suggestions
+
 def black_scholes(S, K, T, r, sigma, option_type="call"):
     """
     Calculate the price of a European option using the Black-Scholes formula.
@@ -31,6 +44,20 @@ def black_scholes(S, K, T, r, sigma, option_type="call"):
         raise ValueError("Invalid option type. Use 'call' or 'put'.")
     return price
 
+def black_scholes_pair(S, K, T, r, sigma):
+    """
+    Calculate both the call and put price of a European option in one pass,
+    sharing d1, d2 and the discount factor.
+    """
+    sigma_sqrt_T = sigma * math.sqrt(T)
+    d1 = (math.log(S / K) + (r + (sigma ** 2) / 2) * T) / sigma_sqrt_T
+    d2 = d1 - sigma_sqrt_T
+
+    discounted_K = K * math.exp(-r * T)
+    call_price = S * norm.cdf(d1) - discounted_K * norm.cdf(d2)
+    put_price = discounted_K * norm.cdf(-d2) - S * norm.cdf(-d1)
+    return call_price, put_price
+
 def fetch_volatility(ticker, period="1y"):
     """
     Fetch volatility (standard deviation of returns) for a stock using yfinance.
@@ -49,7 +76,7 @@ st.header("Stock Volatility Fetcher")
 
 # Search Bar for Stock Ticker with Suggestions
 ticker_input = st.text_input("Enter Stock Ticker Symbol (e.g., AAPL, TSLA)", value="AAPL")
-search_suggestions = [ticker for ticker in STOCK_TICKERS if ticker.startswith(ticker_input.upper())]
+search_suggestions = get_ticker_suggestions(ticker_input.upper())
 
 # Display search suggestions if there are any
 if search_suggestions:
@@ -83,23 +110,36 @@ sigma = st.sidebar.number_input("Volatility (σ) (as a decimal)", min_value=0.0,
 call_price_placeholder = st.empty()
 put_price_placeholder = st.empty()
 
-# Update live reading of option prices
-def update_option_prices():
-    call_price = black_scholes(S, K, T, r, sigma, option_type="call")
-    put_price = black_scholes(S, K, T, r, sigma, option_type="put")
-    
-    # Display the updated option prices in the placeholders with custom styling
-    call_price_placeholder.markdown(f"""
+# Cached Black-Scholes pricing so unchanged inputs skip recomputation on rerun
+@st.cache_data
+def _cached_bs_pair(S, K, T, r, sigma):
+    return black_scholes_pair(S, K, T, r, sigma)
+
+# Option price boxes, formatted with % so the markup is built once at import
+CALL_PRICE_TEMPLATE = """
     <div style="background-color: green; color: white; padding: 20px; text-align: center; font-size: 24px; border-radius: 10px;">
-        Call Option Price: ${call_price:.2f}
+        Call Option Price: $%.2f
     </div>
-    """, unsafe_allow_html=True)
-    
-    put_price_placeholder.markdown(f"""
+    """
+PUT_PRICE_TEMPLATE = """
     <div style="background-color: red; color: white; padding: 20px; text-align: center; font-size: 24px; border-radius: 10px;">
-        Put Option Price: ${put_price:.2f}
+        Put Option Price: $%.2f
     </div>
-    """, unsafe_allow_html=True)
+    """
+
+# Cached rendering of the styled option price boxes
+@st.cache_data
+def _option_price_html(call_price, put_price):
+    return CALL_PRICE_TEMPLATE % call_price, PUT_PRICE_TEMPLATE % put_price
+
+# Update live reading of option prices
+def update_option_prices():
+    call_price, put_price = _cached_bs_pair(S, K, T, r, sigma)
+    call_html, put_html = _option_price_html(call_price, put_price)
+    
+    # Display the updated option prices in the placeholders with custom styling
+    call_price_placeholder.markdown(call_html, unsafe_allow_html=True)
+    put_price_placeholder.markdown(put_html, unsafe_allow_html=True)
 
 # Initial update to show prices when inputs change
 update_option_prices()
@@ -1,5 +1,6 @@
 import streamlit as st
-from black_scholes import black_scholes
+import bisect
+from black_scholes import black_scholes_pair
 from volatility_fetcher import fetch_volatility
 from heatmap_generator import generate_heatmaps
 from risk_return import main as calculate_portfolio_risk
@@ -16,6 +17,32 @@ STOCK_TICKERS = [
     "MSCI", "BA", "GE", "INTC", "IBM", "DIS", "GS", "WMT", "JPM", "BABA"
 ]
 
+# Sorted copy for bisect-based prefix suggestions
+SORTED_STOCK_TICKERS = tuple(sorted(STOCK_TICKERS))
+
+@st.cache_data
+def get_ticker_suggestions(prefix):
+    i = bisect.bisect_left(SORTED_STOCK_TICKERS, prefix)
+    suggestions = []
+    while i < len(SORTED_STOCK_TICKERS) and SORTED_STOCK_TICKERS[i].startswith(prefix):
+        suggestions.append(SORTED_STOCK_TICKERS[i])
+        i += 1
+    return suggestions
+
+# Fetch the latest close for every symbol in one batched download; the short
+# TTL lets repeated "Calculate" clicks skip the network entirely
+@st.cache_data(ttl=60)
+def fetch_current_prices(symbols):
+    data = yf.download(list(symbols), period="1d", group_by="ticker", threads=True, progress=False)
+    prices = {}
+    for symbol in symbols:
+        try:
+            closes = data[symbol]["Close"] if isinstance(data.columns, pd.MultiIndex) else data["Close"]
+            prices[symbol] = closes.dropna().iloc[-1]
+        except (KeyError, IndexError):
+            continue
+    return prices
+
 st.title("Black-Scholes Option Pricing Calculator")
 
 # Sidebar Header
@@ -50,19 +77,25 @@ if st.session_state["time_frame"] != time_frame:
             
             # Prepare portfolio tuples
             portfolio_tuples = []
-            for entry in st.session_state["portfolio_risk_entries"]:
-                if entry["stock"].strip() and entry["shares"] > 0:
-                    try:
-                        # Fetch current stock price
-                        stock = yf.Ticker(entry["stock"].upper())
-                        current_price = stock.history(period="1d")["Close"].iloc[-1]
+            valid_entries = [
+                (entry["stock"].upper(), entry["shares"])
+                for entry in st.session_state["portfolio_risk_entries"]
+                if entry["stock"].strip() and entry["shares"] > 0
+            ]
+            if valid_entries:
+                try:
+                    # Fetch current stock prices in a single request
+                    prices = fetch_current_prices(tuple(symbol for symbol, _ in valid_entries))
+                except Exception as e:
+                    prices = {}
+                    st.error(f"Error refetching prices: {e}")
 
+                for symbol, shares in valid_entries:
+                    if symbol in prices:
                         # Create tuple with stock ticker, shares, and current price
-                        portfolio_tuples.append(
-                            (entry["stock"].upper(), entry["shares"], current_price)
-                        )
-                    except Exception as e:
-                        st.error(f"Error refetching price for {entry['stock']}: {e}")
+                        portfolio_tuples.append((symbol, shares, prices[symbol]))
+                    else:
+                        st.error(f"Error refetching price for {symbol}")
 
             if portfolio_tuples:
                 try:
@@ -109,7 +142,7 @@ st.header("Stock Volatility Fetcher")
 
 # Search Bar for Stock Ticker with Suggestions
 ticker_input = st.text_input("Enter Stock Ticker Symbol (e.g., AAPL, TSLA)", value="AAPL")
-search_suggestions = [ticker for ticker in STOCK_TICKERS if ticker.startswith(ticker_input.upper())]
+search_suggestions = get_ticker_suggestions(ticker_input.upper())
 
 # Display search suggestions if there are any
 if search_suggestions:
@@ -182,23 +215,36 @@ st.header("Black-Scholes Calculation")
 call_price_placeholder = st.empty()
 put_price_placeholder = st.empty()
 
-# Update live reading of option prices
-def update_option_prices():
-    call_price = black_scholes(S, K, T, r, sigma, option_type="call")
-    put_price = black_scholes(S, K, T, r, sigma, option_type="put")
-    
-    # Display the updated option prices in the placeholders with custom styling
-    call_price_placeholder.markdown(f"""
+# Cached Black-Scholes pricing so unchanged inputs skip recomputation on rerun
+@st.cache_data
+def _cached_bs_pair(S, K, T, r, sigma):
+    return black_scholes_pair(S, K, T, r, sigma)
+
+# Option price boxes, formatted with % so the markup is built once at import
+CALL_PRICE_TEMPLATE = """
     <div style="background-color: green; color: white; padding: 20px; text-align: center; font-size: 24px; border-radius: 10px;">
-        Call Option Price: ${call_price:.2f}
+        Call Option Price: $%.2f
     </div>
-    """, unsafe_allow_html=True)
-    
-    put_price_placeholder.markdown(f"""
+    """
+PUT_PRICE_TEMPLATE = """
     <div style="background-color: red; color: white; padding: 20px; text-align: center; font-size: 24px; border-radius: 10px;">
-        Put Option Price: ${put_price:.2f}
+        Put Option Price: $%.2f
     </div>
-    """, unsafe_allow_html=True)
+    """
+
+# Cached rendering of the styled option price boxes
+@st.cache_data
+def _option_price_html(call_price, put_price):
+    return CALL_PRICE_TEMPLATE % call_price, PUT_PRICE_TEMPLATE % put_price
+
+# Update live reading of option prices
+def update_option_prices():
+    call_price, put_price = _cached_bs_pair(S, K, T, r, sigma)
+    call_html, put_html = _option_price_html(call_price, put_price)
+    
+    # Display the updated option prices in the placeholders with custom styling
+    call_price_placeholder.markdown(call_html, unsafe_allow_html=True)
+    put_price_placeholder.markdown(put_html, unsafe_allow_html=True)
 
 # Initial update to show prices when inputs change
 update_option_prices()
@@ -289,19 +335,25 @@ def remove_portfolio_entry():
 # Function to calculate portfolio risk
 def calculate_portfolio_risk_results():
     portfolio_tuples = []
-    for entry in st.session_state[PORTFOLIO_ENTRIES_KEY]:
-        if entry["stock"].strip() and entry["shares"] > 0:
-            try:
-                # Fetch current stock price
-                stock = yf.Ticker(entry["stock"].upper())
-                current_price = stock.history(period="1d")["Close"].iloc[-1]
+    valid_entries = [
+        (entry["stock"].upper(), entry["shares"])
+        for entry in st.session_state[PORTFOLIO_ENTRIES_KEY]
+        if entry["stock"].strip() and entry["shares"] > 0
+    ]
+    if valid_entries:
+        try:
+            # Fetch current stock prices in a single request
+            prices = fetch_current_prices(tuple(symbol for symbol, _ in valid_entries))
+        except Exception as e:
+            prices = {}
+            st.error(f"Error fetching prices: {e}")
 
+        for symbol, shares in valid_entries:
+            if symbol in prices:
                 # Create tuple with stock ticker, shares, and current price
-                portfolio_tuples.append(
-                    (entry["stock"].upper(), entry["shares"], current_price)
-                )
-            except Exception as e:
-                st.error(f"Error fetching price for {entry['stock']}: {e}")
+                portfolio_tuples.append((symbol, shares, prices[symbol]))
+            else:
+                st.error(f"Error fetching price for {symbol}")
 
     if portfolio_tuples:
         try:
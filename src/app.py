@@ -1,30 +1,44 @@
 import streamlit as st
-import yfinance as yf
-import pandas as pd
+import numpy as np
 import re
+import hashlib
+import struct
 
 # Import custom modules
 from cache_utils import (
     cached_fetch_volatility, 
     cached_get_crypto_stats, 
     safe_fetch_stock_price, 
+    safe_fetch_stock_prices,
+    get_portfolio_performance_metrics,
     initialize_session_state
 )
-from options.black_scholes import black_scholes
+from bs_app_common import (
+    get_ticker_suggestions,
+    calculate_option_prices,
+    display_portfolio_entries,
+    display_portfolio_results,
+)
+from price_cache import invalidate as invalidate_price
 from stocks.volatility_fetcher import fetch_volatility
-from options.heatmap_generator import generate_heatmaps
-from stocks.risk_return import calculate_portfolio_metrics as calculate_portfolio_risk
 from stocks.stock_alert import monitor_stock
 
 # Initial Setup
 st.set_page_config(layout="wide", page_title="Cosine", page_icon="📈")
 
-# Predefined stock tickers
-STOCK_TICKERS = [
-    "AAPL", "TSLA", "GOOGL", "AMZN", "MSFT", "META", 
-    "NFLX", "NVDA", "SPY", "VTI", "MSCI", "BA", "GE", 
-    "INTC", "IBM", "DIS", "GS", "WMT", "JPM", "BABA"
-]
+# Option price boxes, formatted with % so the markup is built once at import
+CALL_PRICE_TEMPLATE = """
+            <div style="background-color: green; color: white; padding: 20px; 
+                 text-align: center; font-size: 24px; border-radius: 10px;">
+                Call Option Price: $%.2f
+            </div>
+            """
+PUT_PRICE_TEMPLATE = """
+            <div style="background-color: red; color: white; padding: 20px; 
+                 text-align: center; font-size: 24px; border-radius: 10px;">
+                Put Option Price: $%.2f
+            </div>
+            """
 
 def main():
     # Initialize session state
@@ -94,7 +108,7 @@ def stock_alerts_section():
     # Stock ticker input with suggestions
     ticker = st.text_input("Stock Ticker Symbol").upper()
     if ticker:
-        search_suggestions = [t for t in STOCK_TICKERS if t.startswith(ticker)]
+        search_suggestions = get_ticker_suggestions(ticker)
         if search_suggestions:
             st.write("Suggestions: ", ", ".join(search_suggestions))
 
@@ -146,6 +160,8 @@ def stock_alerts_section():
     # Display existing alerts
     if st.session_state.alerts:
         st.subheader("Your Active Alerts")
+        import pandas as pd
+
         alerts_df = pd.DataFrame(st.session_state.alerts)
         alerts_df = alerts_df.rename(columns={
             "email": "Email",
@@ -208,9 +224,7 @@ def stock_volatility_section():
     ticker_input = st.text_input("Enter Stock Ticker Symbol", value="AAPL")
     
     # Efficient suggestions
-    search_suggestions = [
-        ticker for ticker in STOCK_TICKERS if ticker.startswith(ticker_input.upper())
-    ]
+    search_suggestions = get_ticker_suggestions(ticker_input.upper())
     
     if search_suggestions:
         st.write("Suggestions: ", ", ".join(search_suggestions))
@@ -240,7 +254,11 @@ def crypto_stats_section():
     time_frame_mapped = time_frame_mapping[st.session_state["time_frame"]]
 
     if selected_crypto_symbol:
-        stats = cached_get_crypto_stats(selected_crypto_symbol, time_frame_mapped)
+        try:
+            stats = cached_get_crypto_stats(selected_crypto_symbol, time_frame_mapped)
+        except ConnectionError as e:
+            st.error(f"{e}. Please try again shortly.")
+            return
 
         if not isinstance(stats, dict) or "error" in stats:
             st.error(stats.get("error", "Unable to fetch cryptocurrency statistics"))
@@ -266,69 +284,51 @@ def option_pricing_section():
 
     st.sidebar.header("Black-Scholes Calculation Input Parameters")
 
-    # Move sidebar inputs outside of cached function
-    sidebar_inputs = {
-        "S": st.sidebar.number_input("Current Stock Price (S)", 
-                                   min_value=0.0, step=1.0, value=100.0),
-        "K": st.sidebar.number_input("Strike Price (K)", 
-                                   min_value=0.0, step=1.0, value=110.0),
-        "T": st.sidebar.number_input("Time to Maturity (T) (in years)", 
-                                   min_value=0.01, step=0.01, value=1.0),
-        "r": st.sidebar.number_input("Risk-Free Interest Rate (r) (as a decimal)", 
-                                   min_value=0.0, step=0.01, value=0.05),
-        "sigma": st.sidebar.number_input("Volatility (σ) (as a decimal)", 
-                                      min_value=0.0, step=0.01, value=0.2)
-    }
+    # Move sidebar inputs outside of cached function; the form batches edits
+    # into a single rerun when "Update" is pressed
+    with st.sidebar.form("bs_inputs"):
+        sidebar_inputs = {
+            "S": st.number_input("Current Stock Price (S)", 
+                                 min_value=0.0, step=1.0, value=100.0, key="S"),
+            "K": st.number_input("Strike Price (K)", 
+                                 min_value=0.0, step=1.0, value=110.0, key="K"),
+            "T": st.number_input("Time to Maturity (T) (in years)", 
+                                 min_value=0.01, step=0.01, value=1.0, key="T"),
+            "r": st.number_input("Risk-Free Interest Rate (r) (as a decimal)", 
+                                 min_value=0.0, step=0.01, value=0.05, key="r"),
+            "sigma": st.number_input("Volatility (σ) (as a decimal)", 
+                                     min_value=0.0, step=0.01, value=0.2, key="sigma")
+        }
+        st.form_submit_button("Update")
     
     # Create containers for option prices
     call_price_container = st.container()
     put_price_container = st.container()
 
-    # Calculate and display option prices
+    # Reuse the rendered price boxes while the inputs are unchanged
+    option_price_key = (
+        sidebar_inputs["S"],
+        sidebar_inputs["K"],
+        sidebar_inputs["T"],
+        sidebar_inputs["r"],
+        sidebar_inputs["sigma"]
+    )
+    if st.session_state.get("option_price_key") == option_price_key:
+        call_html, put_html = st.session_state.option_price_html
+    else:
+        # Calculate both option prices in a single pass
+        call_price, put_price = calculate_option_prices(*option_price_key)
+        call_html = CALL_PRICE_TEMPLATE % call_price
+        put_html = PUT_PRICE_TEMPLATE % put_price
+        st.session_state.option_price_key = option_price_key
+        st.session_state.option_price_html = (call_html, put_html)
+
+    # Display option prices
     with call_price_container:
-        call_price = calculate_option_price(
-            sidebar_inputs["S"],
-            sidebar_inputs["K"],
-            sidebar_inputs["T"],
-            sidebar_inputs["r"],
-            sidebar_inputs["sigma"],
-            option_type="call"
-        )
-        st.markdown(
-            f"""
-            <div style="background-color: green; color: white; padding: 20px; 
-                 text-align: center; font-size: 24px; border-radius: 10px;">
-                Call Option Price: ${call_price:.2f}
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
+        st.markdown(call_html, unsafe_allow_html=True)
 
     with put_price_container:
-        put_price = calculate_option_price(
-            sidebar_inputs["S"],
-            sidebar_inputs["K"],
-            sidebar_inputs["T"],
-            sidebar_inputs["r"],
-            sidebar_inputs["sigma"],
-            option_type="put"
-        )
-        st.markdown(
-            f"""
-            <div style="background-color: red; color: white; padding: 20px; 
-                 text-align: center; font-size: 24px; border-radius: 10px;">
-                Put Option Price: ${put_price:.2f}
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
-
-@st.cache_data
-def calculate_option_price(S, K, T, r, sigma, option_type):
-    """
-    Cached function for calculating option prices
-    """
-    return black_scholes(S, K, T, r, sigma, option_type=option_type)
+        st.markdown(put_html, unsafe_allow_html=True)
 
 def heatmap_section():
     st.header("Heatmaps: Option Price as a Function of Stock Price and Volatility")
@@ -336,10 +336,12 @@ def heatmap_section():
 
     # Get heatmap parameters with validation - moved outside of cached function
     st.sidebar.header("Heatmap parameters")
-    min_S = st.sidebar.number_input("Minimum Stock Price (S)", min_value=0.0, step=1.0, value=50.0)
-    max_S = st.sidebar.number_input("Maximum Stock Price (S)", min_value=0.0, step=1.0, value=150.0)
-    min_sigma = st.sidebar.slider("Minimum Volatility (σ)", 0.01, 1.0, 0.1)
-    max_sigma = st.sidebar.slider("Maximum Volatility (σ)", 0.01, 1.0, 0.5)
+    with st.sidebar.form("heatmap_inputs"):
+        min_S = st.number_input("Minimum Stock Price (S)", min_value=0.0, step=1.0, value=50.0)
+        max_S = st.number_input("Maximum Stock Price (S)", min_value=0.0, step=1.0, value=150.0)
+        min_sigma = st.slider("Minimum Volatility (σ)", 0.01, 1.0, 0.1)
+        max_sigma = st.slider("Maximum Volatility (σ)", 0.01, 1.0, 0.5)
+        st.form_submit_button("Update Heatmaps")
     
     # Package parameters into a dict
     heatmap_params = {
@@ -349,16 +351,17 @@ def heatmap_section():
         "max_sigma": max_sigma
     }
 
-    # Check if parameters have changed
-    if has_heatmap_params_changed(heatmap_params):
-        update_heatmap(heatmap_params)
+    # Regenerate only when one of the pricing inputs or heatmap bounds changed
+    sidebar_inputs = get_sidebar_inputs()
+    heatmap_key = get_heatmap_key(sidebar_inputs, heatmap_params)
+    if st.session_state.get("heatmap_key") != heatmap_key:
+        update_heatmap(sidebar_inputs, heatmap_params, heatmap_key)
 
     # Display heatmaps from session state
     display_heatmaps()
 
-@st.cache_data
 def get_sidebar_inputs():
-    """Cached function to get sidebar inputs for BS calculation"""
+    """Get the BS calculation sidebar inputs stored under their widget keys"""
     return {
         "S": st.session_state.get("S", 100.0),
         "K": st.session_state.get("K", 110.0),
@@ -367,38 +370,62 @@ def get_sidebar_inputs():
         "sigma": st.session_state.get("sigma", 0.2)
     }
 
-def has_heatmap_params_changed(new_params):
-    """Check if heatmap parameters have changed"""
-    current_params = st.session_state.get("heatmap_params", {
-        "min_S": None,
-        "max_S": None,
-        "min_sigma": None,
-        "max_sigma": None
-    })
-    return any(
-        current_params.get(key) != value
-        for key, value in new_params.items()
+def get_heatmap_key(sidebar_inputs, params):
+    """Content hash of every input the heatmaps depend on"""
+    packed = struct.pack(
+        "8d",
+        sidebar_inputs["S"],
+        sidebar_inputs["K"],
+        sidebar_inputs["T"],
+        sidebar_inputs["r"],
+        params["min_S"],
+        params["max_S"],
+        params["min_sigma"],
+        params["max_sigma"]
     )
+    return hashlib.blake2b(packed, digest_size=8).hexdigest()
+
+@st.cache_data
+def get_heatmap_grid(min_S, max_S, min_sigma, max_sigma, n_S=10, n_sigma=10):
+    """Cached stock price and volatility axes for the heatmaps"""
+    return np.linspace(min_S, max_S, n_S), np.linspace(min_sigma, max_sigma, n_sigma)
+
+def get_heatmap_buffers(shape):
+    """Reuse the session's heatmap output arrays while the grid shape is unchanged"""
+    buffers = st.session_state.get("heatmap_buffers")
+    if buffers is None or buffers[0].shape != shape:
+        buffers = (np.empty(shape), np.empty(shape))
+        st.session_state.heatmap_buffers = buffers
+    return buffers
 
 @st.cache_data
-def cached_generate_heatmaps(S, K, T, r, min_S, max_S, min_sigma, max_sigma):
+def cached_generate_heatmaps(S, K, T, r, stock_prices, volatilities, _out_call, _out_put):
     """Cached wrapper for heatmap generation"""
-    return generate_heatmaps(S, K, T, r, min_S, max_S, min_sigma, max_sigma)
+    # Deferred so plotly and the Numba kernel load only once heatmaps are needed
+    from options.heatmap_generator import generate_heatmaps
 
-def update_heatmap(params):
+    return generate_heatmaps(S, K, T, r, stock_prices, volatilities, _out_call, _out_put)
+
+def update_heatmap(sidebar_inputs, params, heatmap_key):
     """Update heatmap with new parameters"""
-    sidebar_inputs = get_sidebar_inputs()
+    stock_prices, volatilities = get_heatmap_grid(
+        params["min_S"],
+        params["max_S"],
+        params["min_sigma"],
+        params["max_sigma"]
+    )
+    out_call, out_put = get_heatmap_buffers((stock_prices.size, volatilities.size))
     st.session_state.heatmaps = cached_generate_heatmaps(
         sidebar_inputs["S"],
         sidebar_inputs["K"],
         sidebar_inputs["T"],
         sidebar_inputs["r"],
-        params["min_S"],
-        params["max_S"],
-        params["min_sigma"],
-        params["max_sigma"]
+        stock_prices,
+        volatilities,
+        out_call,
+        out_put
     )
-    st.session_state.heatmap_params = params.copy()
+    st.session_state.heatmap_key = heatmap_key
 
 def display_heatmaps():
     """Display heatmaps if they exist in session state"""
@@ -411,132 +438,54 @@ def display_heatmaps():
 def portfolio_risk_section():
     st.header("Portfolio Risk Calculator")
     
-    # Portfolio management buttons
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        if st.button("Add Stock +"):
-            add_portfolio_entry()
-    with col2:
-        if st.button("Calculate Portfolio Risk"):
-            calculate_and_update_portfolio_risk()
-
-    # Display portfolio entries
+    # Display portfolio entries; rows are added and removed in the grid itself
     display_portfolio_entries()
-    
+
+    calculate_col, refresh_col = st.columns(2)
+    if calculate_col.button("Calculate Portfolio Risk"):
+        calculate_and_update_portfolio_risk()
+
+    # Drop the cached quotes so the recalculation uses live prices
+    if refresh_col.button("Refresh Prices"):
+        for entry in st.session_state.portfolio_risk_entries:
+            if entry["stock"].strip():
+                invalidate_price(entry["stock"].upper())
+        calculate_and_update_portfolio_risk()
+
     # Automatically display results if already calculated
     display_portfolio_results()
 
-def add_portfolio_entry():
-    st.session_state.portfolio_risk_entries.append({"stock": "", "shares": 0.0})
+def calculate_and_update_portfolio_risk():
+    entries = [
+        entry for entry in st.session_state.portfolio_risk_entries
+        if entry["stock"].strip() and entry["shares"] > 0
+    ]
+    symbols = np.array([entry["stock"].upper() for entry in entries], dtype=str)
+    shares = np.array([entry["shares"] for entry in entries], dtype=np.float64)
 
-def remove_portfolio_entry(index):
-    del st.session_state.portfolio_risk_entries[index]
+    # Fetch every current price in a single batched download
+    prices = safe_fetch_stock_prices(tuple(symbols.tolist())) if entries else None
 
-def calculate_and_update_portfolio_risk():
-    portfolio_tuples = []
-    for entry in st.session_state.portfolio_risk_entries:
-        if entry["stock"].strip() and entry["shares"] > 0:
-            current_price = safe_fetch_stock_price(entry["stock"])
-            if current_price is not None:
-                portfolio_tuples.append(
-                    (entry["stock"].upper(), entry["shares"], current_price)
-                )
+    portfolio_tuples = ()
+    if prices is not None:
+        valid = ~np.isnan(prices)
+        # A sorted tuple gives one cache key per portfolio, whatever the row order
+        portfolio_tuples = tuple(sorted(zip(
+            symbols[valid].tolist(), shares[valid].tolist(), prices[valid].tolist()
+        )))
 
     if portfolio_tuples:
-        try:
-            results = calculate_portfolio_risk(
-                portfolio_tuples, 
-                period=st.session_state.time_frame
-            )
-            st.session_state.portfolio_risk_results = results
-        except Exception as e:
-            st.session_state.portfolio_risk_results = {
-                "error": f"Error calculating portfolio risk: {str(e)}"
-            }
+        results = get_portfolio_performance_metrics(
+            portfolio_tuples,
+            period=st.session_state.time_frame
+        )
+        st.session_state.portfolio_risk_results = results or {
+            "error": "Error calculating portfolio risk"
+        }
     else:
         st.session_state.portfolio_risk_results = {
             "warning": "Please enter at least one valid stock with shares."
         }
 
-def display_portfolio_entries():
-    for i, entry in enumerate(st.session_state.portfolio_risk_entries):
-        col1, col2, col3 = st.columns([3, 2, 1])
-        
-        with col1:
-            entry["stock"] = st.text_input(
-                f"Stock Ticker {i + 1}",
-                value=entry["stock"],
-                key=f"stock_input_{i}"
-            )
-
-        with col2:
-            entry["shares"] = st.number_input(
-                f"Number of Shares {i + 1}",
-                min_value=0.0,
-                value=float(entry["shares"]),
-                step=0.1,
-                key=f"shares_input_{i}",
-                format="%.3f"
-            )
-
-        with col3: 
-            if st.button("Remove", key=f"remove_{i}"):
-                remove_portfolio_entry(i)
-
-def display_portfolio_results():
-    if not st.session_state.portfolio_risk_results:
-        return
-
-    results = st.session_state.portfolio_risk_results
-
-    if "error" in results:
-        st.error(results["error"])
-        return
-    if "warning" in results:
-        st.warning(results["warning"])
-        return
-
-    # Define the `cols` variable with st.columns()
-    cols = st.columns(4)  # Adjust the number of columns as needed
-    metrics = [
-        ("Total Portfolio Value", f"${results['total_portfolio_value']:,.2f}"),
-        ("Expected Annual Return", f"{results['portfolio_expected_return']:.2f}%"),
-        ("Portfolio Volatility", f"{results['portfolio_volatility']:.2f}%"),
-        ("Sharpe Ratio", f"{results['sharpe_ratio']:.2f}")
-    ]
-
-    for col, (label, value) in zip(cols, metrics):
-        col.metric(label, value)
-
-    # Display stock details
-    st.subheader("Individual Stock Details")
-    display_stock_details(results["stock_details"])
-
-def display_stock_details(stock_details):
-    stock_details_df = pd.DataFrame.from_dict(
-        {
-            ticker: {
-                "Weight (%)": details["weight"] * 100,
-                "Annual Return (%)": details["annual_return"] * 100,
-                "Annual Volatility (%)": details["annual_volatility"] * 100,
-                "Shares": details["shares"],
-                "Current Price": details["current_price"],
-                "Total Value": details["total_value"],
-            }
-            for ticker, details in stock_details.items()
-        },
-        orient="index"
-    )
-
-    st.dataframe(
-        stock_details_df.style.format({
-            'Weight (%)': '{:.2f}',
-            'Annual Return (%)': '{:.2f}',
-            'Annual Volatility (%)': '{:.2f}',
-            'Current Price': '${:.2f}',
-            'Total Value': '${:,.2f}'
-        })
-    )
-
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,143 @@
+"""
+Shared helpers for the Streamlit app: ticker suggestions, cached option
+pricing and the portfolio entry/result widgets.
+"""
+import bisect
+from functools import lru_cache
+
+import streamlit as st
+
+from options.black_scholes import black_scholes_pair
+
+# Predefined stock tickers, frozen for constant-time membership checks
+STOCK_TICKERS = frozenset({
+    "AAPL", "TSLA", "GOOGL", "AMZN", "MSFT", "META", 
+    "NFLX", "NVDA", "SPY", "VTI", "MSCI", "BA", "GE", 
+    "INTC", "IBM", "DIS", "GS", "WMT", "JPM", "BABA"
+})
+# Sorted once so prefix suggestions can bisect instead of scanning every ticker
+SORTED_STOCK_TICKERS = tuple(sorted(STOCK_TICKERS))
+
+@lru_cache(maxsize=256)
+def get_ticker_suggestions(prefix):
+    """Return the predefined tickers starting with prefix, in sorted order"""
+    i = bisect.bisect_left(SORTED_STOCK_TICKERS, prefix)
+    suggestions = []
+    while i < len(SORTED_STOCK_TICKERS) and SORTED_STOCK_TICKERS[i].startswith(prefix):
+        suggestions.append(SORTED_STOCK_TICKERS[i])
+        i += 1
+    return tuple(suggestions)
+
+@st.cache_data
+def calculate_option_prices(S, K, T, r, sigma):
+    """
+    Cached function for calculating the (call, put) option prices together
+    """
+    return black_scholes_pair(S, K, T, r, sigma)
+
+def display_portfolio_entries():
+    """Render the portfolio as one editable grid and sync it back to session state"""
+    import pandas as pd
+
+    # The editor keeps its own edit state relative to this base frame, so it
+    # must stay the same object across reruns
+    if "portfolio_entries_base" not in st.session_state:
+        st.session_state.portfolio_entries_base = pd.DataFrame(
+            st.session_state.portfolio_risk_entries, columns=["stock", "shares"]
+        )
+
+    edited_entries = st.data_editor(
+        st.session_state.portfolio_entries_base,
+        num_rows="dynamic",
+        column_config={
+            "stock": st.column_config.TextColumn("Stock Ticker"),
+            "shares": st.column_config.NumberColumn(
+                "Number of Shares",
+                min_value=0.0,
+                step=0.1,
+                format="%.3f"
+            ),
+        },
+        hide_index=True,
+        use_container_width=True,
+        key="portfolio_editor"
+    )
+
+    # Rows added in the grid start out empty
+    st.session_state.portfolio_risk_entries = [
+        {
+            "stock": stock if isinstance(stock, str) else "",
+            "shares": float(shares) if pd.notna(shares) else 0.0
+        }
+        for stock, shares in zip(edited_entries["stock"], edited_entries["shares"])
+    ]
+
+def display_portfolio_results():
+    if not st.session_state.portfolio_risk_results:
+        return
+
+    results = st.session_state.portfolio_risk_results
+
+    if "error" in results:
+        st.error(results["error"])
+        return
+    if "warning" in results:
+        st.warning(results["warning"])
+        return
+
+    # Define the `cols` variable with st.columns()
+    cols = st.columns(4)  # Adjust the number of columns as needed
+    metrics = [
+        ("Total Portfolio Value", f"${results['total_portfolio_value']:,.2f}"),
+        ("Expected Annual Return", f"{results['portfolio_expected_return']:.2f}%"),
+        ("Portfolio Volatility", f"{results['portfolio_volatility']:.2f}%"),
+        ("Sharpe Ratio", f"{results['sharpe_ratio']:.2f}")
+    ]
+
+    for col, (label, value) in zip(cols, metrics):
+        col.metric(label, value)
+
+    # Display stock details
+    st.subheader("Individual Stock Details")
+    display_stock_details(results["stock_details"])
+
+def display_stock_details(stock_details):
+    import pandas as pd
+
+    # Build directly from flat records so every value column stays numeric
+    records = [
+        (
+            ticker,
+            details["weight"] * 100,
+            details["annual_return"] * 100,
+            details["annual_volatility"] * 100,
+            details["shares"],
+            details["current_price"],
+            # sprintf-style column formats can't group thousands, so this one is preformatted
+            f"${details['total_value']:,.2f}",
+        )
+        for ticker, details in stock_details.items()
+    ]
+    stock_details_df = pd.DataFrame(
+        records,
+        columns=[
+            "Ticker",
+            "Weight (%)",
+            "Annual Return (%)",
+            "Annual Volatility (%)",
+            "Shares",
+            "Current Price",
+            "Total Value",
+        ]
+    ).set_index("Ticker")
+
+    # Formatting happens client-side, so the numeric columns still sort numerically
+    st.dataframe(
+        stock_details_df,
+        column_config={
+            "Weight (%)": st.column_config.NumberColumn(format="%.2f"),
+            "Annual Return (%)": st.column_config.NumberColumn(format="%.2f"),
+            "Annual Volatility (%)": st.column_config.NumberColumn(format="%.2f"),
+            "Current Price": st.column_config.NumberColumn(format="$%.2f"),
+        }
+    )
@@ -0,0 +1,9 @@
+"""
+Cache lifetimes, in seconds, matched to how often the underlying data changes.
+"""
+
+# Live quotes move throughout the trading day
+TTL_INTRADAY = 60
+
+# Daily history (closes, returns, volatility, correlation) only changes after the close
+TTL_DAILY_CLOSE = 24 * 60 * 60
@@ -1,18 +1,48 @@
 import streamlit as st
-import yfinance as yf
-import pandas as pd
 import numpy as np
+import copy
+import logging
 from datetime import datetime
+from functools import lru_cache
 
 # Import custom modules
+import price_cache
+from cache_ttl import TTL_DAILY_CLOSE
 from crypto.crypto_statistics import get_crypto_stats
 from stocks.risk_return import (
     calculate_portfolio_metrics,
     calculate_correlation,
+    fetch_price_panel,
 )
 
+logger = logging.getLogger(__name__)
+
 # Caching Strategy for Expensive Computations
-@st.cache_data(ttl=3600)  # Cache results for 1 hour
+# st.cache_data is shared by every session on the server, so these caches
+# already dedupe network calls across users; max_entries bounds their growth
+# as users look up more and more tickers.
+TICKER_CACHE_MAX_ENTRIES = 512
+
+# Symbols per yf.download request, keeping each request URL within Yahoo's limits
+YF_BATCH_SIZE = 20
+
+# Pooled connections per host in the shared Yahoo Finance session
+YF_POOL_SIZE = 20
+
+@lru_cache(maxsize=1)
+def _shared_yf_session():
+    """
+    One keep-alive requests.Session for every yfinance call, created on first use
+    so that the TLS handshake is paid once rather than per ticker.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=YF_POOL_SIZE, pool_maxsize=YF_POOL_SIZE))
+    return session
+
+@st.cache_data(ttl=TTL_DAILY_CLOSE, max_entries=TICKER_CACHE_MAX_ENTRIES)
 def cached_fetch_volatility(_fetch_function, ticker, period):
     """
     Cached wrapper for volatility fetching
@@ -27,8 +57,8 @@ def cached_fetch_volatility(_fetch_function, ticker, period):
     """
     return _fetch_function(ticker, period)
 
-@st.cache_data(ttl=86400)  # Cache crypto stats for 24 hours
-def cached_get_crypto_stats(symbol, period):
+@st.cache_data(ttl=TTL_DAILY_CLOSE)
+def cached_get_crypto_stats(symbol, period, sample_stride=1):
 
     """
     Cached wrapper for cryptocurrency statistics
@@ -36,18 +66,20 @@ def cached_get_crypto_stats(symbol, period):
     Args:
         symbol (str): Cryptocurrency symbol
         period (int): Time period in days
-        @st.cache_data(ttl=86400)  # Cache for 24 hours
+        sample_stride (int): Use every nth daily close for volatility
     
     Returns:
         dict: Cryptocurrency statistics
+    
+    Raises:
+        ConnectionError: CryptoCompare gave no data; raised so the failure isn't cached
     """
-    print(f"Cache Miss - Fetching data for {symbol} with period {period}")
-    return get_crypto_stats(symbol, period)
+    logger.debug(f"Cache miss - fetching {symbol} stats for {period} days (sample_stride={sample_stride})")
+    return get_crypto_stats(symbol, period, sample_stride)
 
-@st.cache_data(ttl=3600)
 def safe_fetch_stock_price(ticker):
     """
-    Safely fetch current stock price with caching
+    Safely fetch current stock price, served from price_cache when fresh
     
     Args:
         ticker (str): Stock ticker symbol
@@ -55,112 +87,191 @@ def safe_fetch_stock_price(ticker):
     Returns:
         float or None: Current stock price or None if error
     """
+    import yfinance as yf
+
+    ticker = ticker.upper()
+    price = price_cache.get(ticker)
+    if price is not None:
+        return price
+
     try:
-        stock = yf.Ticker(ticker.upper())
-        return stock.history(period="1d")["Close"].iloc[-1]
+        price = yf.Ticker(ticker, session=_shared_yf_session()).fast_info["last_price"]
+        price_cache.put(ticker, price)
+        return price
+    except KeyError:
+        st.error(f"No price available for {ticker}")
+        return None
     except Exception as e:
         st.error(f"Error fetching price for {ticker}: {e}")
         return None
 
-@st.cache_data(ttl=3600)
-def cached_portfolio_metrics(portfolio_tuples, period="1y", risk_free_rate=0.05):
+def safe_fetch_stock_prices(tickers):
+    """
+    Safely fetch current prices for several stocks; prices missing from price_cache
+    are downloaded in batches of YF_BATCH_SIZE symbols
+    
+    Args:
+        tickers (tuple): Stock ticker symbols
+    
+    Returns:
+        np.ndarray or None: Current prices aligned with tickers (NaN where unavailable), or None if error
+    """
+    import yfinance as yf
+
+    try:
+        symbols = [ticker.upper() for ticker in tickers]
+        cached = price_cache.get_many(symbols)
+        prices = np.array([cached.get(symbol) for symbol in symbols], dtype=np.float64)
+
+        # Download each missing symbol once, however often it is repeated
+        missing = list(dict.fromkeys(np.array(symbols)[np.isnan(prices)].tolist()))
+        fetched = {}
+        for start in range(0, len(missing), YF_BATCH_SIZE):
+            batch = missing[start:start + YF_BATCH_SIZE]
+            downloaded = yf.download(
+                batch, period="1d", threads=True, progress=False, auto_adjust=True,
+                session=_shared_yf_session()
+            )
+            # A batch of only unknown symbols comes back empty; they stay NaN
+            if downloaded.empty:
+                continue
+            closes = downloaded["Close"]
+            if closes.ndim == 1:
+                closes = closes.to_frame(batch[0])
+            last_closes = closes.ffill().iloc[-1].reindex(batch).dropna()
+            fetched.update((symbol, float(price)) for symbol, price in last_closes.items())
+
+        if fetched:
+            price_cache.put_many(fetched)
+
+        for i, symbol in enumerate(symbols):
+            if symbol in fetched:
+                prices[i] = fetched[symbol]
+        return prices
+    except Exception as e:
+        st.error(f"Error fetching prices for {', '.join(tickers)}: {e}")
+        return None
+
+@st.cache_data(ttl=TTL_DAILY_CLOSE)
+def cached_price_panel(tickers, period="1y"):
+    """
+    Cached download of the daily price history shared by the portfolio caches
+    
+    Args:
+        tickers (tuple): Sorted tuple of stock tickers
+        period (str): Time period for the price history
+    
+    Returns:
+        pd.DataFrame: Adjusted close prices, one column per ticker
+    """
+    return fetch_price_panel(list(tickers), period)
+
+@st.cache_data(ttl=TTL_DAILY_CLOSE)
+def cached_portfolio_metrics(portfolio_tuples, period="1y", risk_free_rate=0.05, _price_panel=None):
     """
     Cached wrapper for portfolio metrics calculation
     
     Args:
-        portfolio_tuples (list): List of tuples with (stock_ticker, number_of_shares, current_price)
+        portfolio_tuples (tuple): Sorted tuple of (stock_ticker, number_of_shares, current_price)
+            tuples; tuples of primitives hash far cheaper than lists
         period (str): Time period for analysis
         risk_free_rate (float): Risk-free rate for Sharpe ratio calculation
+        _price_panel (pd.DataFrame): Pre-fetched price history (not hashed; implied by the tickers and period)
     
     Returns:
         dict: Portfolio metrics including risk, return, and stock details
     """
     try:
-        return calculate_portfolio_metrics(portfolio_tuples, period, risk_free_rate)
+        return calculate_portfolio_metrics(
+            portfolio_tuples, period, risk_free_rate, price_panel=_price_panel
+        )
     except Exception as e:
         st.error(f"Error calculating portfolio metrics: {e}")
         return None
 
-@st.cache_data(ttl=3600)
-def cached_correlation_matrix(tickers, period="1y"):
+@st.cache_resource(ttl=TTL_DAILY_CLOSE)
+def cached_correlation_matrix(tickers, period="1y", _price_panel=None):
     """
     Cached wrapper for correlation matrix calculation
     
+    The result is shared across sessions without copying, so callers must not mutate it.
+    
     Args:
-        tickers (list): List of stock tickers
+        tickers (tuple): Sorted tuple of stock tickers
         period (str): Time period for correlation calculation
+        _price_panel (pd.DataFrame): Pre-fetched price history (not hashed; implied by the tickers and period)
     
     Returns:
-        pd.DataFrame: Correlation matrix
+        dict: Correlation matrix as a nested {ticker: {ticker: correlation}} dict
     """
     try:
-        return calculate_correlation(tickers, period)
+        return calculate_correlation(list(tickers), period, price_panel=_price_panel).to_dict()
     except Exception as e:
         st.error(f"Error calculating correlation matrix: {e}")
         return None
 
+# Session state defaults, built once; mutable values are copied on insertion
+# so sessions never share them
+_DEFAULT_STATES = {
+    "time_frame": "1y",  # Default time frame for stock data
+    "portfolio_risk_entries": [{"stock": "", "shares": 0.0}],  # Default portfolio risk entries
+    "portfolio_risk_results": None,  # Portfolio risk results will be calculated dynamically
+    "current_volatility_ticker": "AAPL",  # Default ticker for volatility calculations
+    "current_volatility": None,  # Placeholder for current volatility data
+    "crypto_stats": None,  # Placeholder for cryptocurrency statistics
+    "option_price_key": None,  # Inputs behind the rendered option price boxes
+    "option_price_html": None,  # Rendered (call, put) option price boxes
+    "heatmaps": None,  # Placeholder for heatmaps
+    "heatmap_buffers": None,  # Reusable (call, put) price arrays for the heatmap grid
+    "heatmap_key": None,  # Content hash of the inputs behind the stored heatmaps
+    "selected_crypto": "BTC",  # Default selected cryptocurrency for stats
+    "correlation_matrix": None,  # Placeholder for correlation matrix
+    "portfolio_metrics_cache": None,  # Cache for portfolio metrics
+    "alerts": []  # Initialize alerts as an empty list
+}
+
 def initialize_session_state():
     """
     Centralize and standardize session state initialization for the app.
     This function ensures that session state variables are set to their default values
     if they are not already initialized.
     """
-    # Define the default values for the session state
-    default_states = {
-        "time_frame": "1y",  # Default time frame for stock data
-        "portfolio_risk_entries": [{"stock": "", "shares": 0.0}],  # Default portfolio risk entries
-        "portfolio_risk_results": None,  # Portfolio risk results will be calculated dynamically
-        "current_volatility_ticker": "AAPL",  # Default ticker for volatility calculations
-        "current_volatility": None,  # Placeholder for current volatility data
-        "crypto_stats": None,  # Placeholder for cryptocurrency statistics
-        "heatmap_params": {
-            "min_S": None,  # Minimum spot price for heatmap
-            "max_S": None,  # Maximum spot price for heatmap
-            "min_sigma": None,  # Minimum volatility for heatmap
-            "max_sigma": None,  # Maximum volatility for heatmap
-        },
-        "heatmaps": None,  # Placeholder for heatmaps
-        "selected_crypto": "BTC",  # Default selected cryptocurrency for stats
-        "correlation_matrix": None,  # Placeholder for correlation matrix
-        "portfolio_metrics_cache": None,  # Cache for portfolio metrics
-        "alerts": []  # Initialize alerts as an empty list
-    }
-    
-    # Iterate through default_states and initialize session state if necessary
-    for key, default_value in default_states.items():
-        if key not in st.session_state:
-            st.session_state[key] = default_value
-
-    # Ensure that alerts are initialized as an empty list
-    if "alerts" not in st.session_state:
-        st.session_state.alerts = []
-
-@st.cache_data(ttl=3600)
+    # Only the keys this session doesn't have yet, found with one set difference
+    missing_keys = _DEFAULT_STATES.keys() - st.session_state.keys()
+    for key in missing_keys:
+        st.session_state[key] = copy.deepcopy(_DEFAULT_STATES[key])
+
+@st.cache_data(ttl=TTL_DAILY_CLOSE)
 def get_portfolio_performance_metrics(portfolio_tuples, period="1y"):
     """
     Cached wrapper for getting comprehensive portfolio performance metrics
     
     Args:
-        portfolio_tuples (list): List of tuples with (stock_ticker, number_of_shares, current_price)
+        portfolio_tuples (tuple): Sorted tuple of (stock_ticker, number_of_shares, current_price)
+            tuples; callers sort so that reordered portfolios share one cache key
         period (str): Time period for analysis
     
     Returns:
         dict: Complete portfolio analysis including correlations and risk metrics
     """
     try:
+        tickers = tuple(t[0] for t in portfolio_tuples)
+
+        # Download the price history once for both the metrics and the correlations
+        price_panel = cached_price_panel(tickers, period)
+
         # Get basic portfolio metrics
-        metrics = cached_portfolio_metrics(portfolio_tuples, period)
+        metrics = cached_portfolio_metrics(portfolio_tuples, period, _price_panel=price_panel)
         if not metrics:
             return None
 
         # Get correlation matrix for portfolio stocks
-        tickers = [t[0] for t in portfolio_tuples]
-        correlation = cached_correlation_matrix(tickers, period)
+        correlation = cached_correlation_matrix(tickers, period, _price_panel=price_panel)
         
         # Combine all metrics
         complete_metrics = {
             **metrics,
-            'correlation_matrix': correlation.to_dict() if correlation is not None else None,
+            'correlation_matrix': correlation,
             'analysis_period': period,
             'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
@@ -170,7 +281,7 @@ def get_portfolio_performance_metrics(portfolio_tuples, period="1y"):
         st.error(f"Error calculating portfolio performance metrics: {e}")
         return None
 
-@st.cache_data(ttl=3600)
+@st.cache_data(ttl=TTL_DAILY_CLOSE)
 def get_crypto_market_data(symbols, period=365):
     """
     Cached wrapper for getting multiple cryptocurrency statistics
@@ -181,6 +292,10 @@ def get_crypto_market_data(symbols, period=365):
     
     Returns:
         dict: Dictionary of cryptocurrency statistics
+    
+    Raises:
+        ConnectionError: CryptoCompare gave no data for a symbol; raised so that
+            a partial result isn't cached
     """
     try:
         crypto_data = {}
@@ -189,6 +304,8 @@ def get_crypto_market_data(symbols, period=365):
             if 'error' not in stats:
                 crypto_data[symbol] = stats
         return crypto_data
+    except ConnectionError:
+        raise
     except Exception as e:
         st.error(f"Error fetching cryptocurrency market data: {e}")
         return None
\ No newline at end of file
@@ -1,21 +1,58 @@
-import cryptocompare
-import pandas as pd
+import threading
+import time
 import numpy as np
 from datetime import datetime
 
-def get_crypto_stats(selected_crypto_symbol, period=365):
+# CryptoCompare rejects bursts above roughly this many calls per second
+CRYPTOCOMPARE_CALLS_PER_SECOND = 10
+
+class _TokenBucket:
+    """
+    Thread-safe token bucket; acquire() blocks until a call is allowed.
+    """
+    def __init__(self, rate):
+        self._rate = rate
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._rate, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            # Reserve a token now, going negative if needed, so concurrent callers queue up
+            wait = max(0.0, (1.0 - self._tokens) / self._rate)
+            self._tokens -= 1.0
+        if wait:
+            time.sleep(wait)
+
+_cryptocompare_limiter = _TokenBucket(CRYPTOCOMPARE_CALLS_PER_SECOND)
+
+def get_crypto_stats(selected_crypto_symbol, period=365, sample_stride=1):
     """
     Fetch cryptocurrency statistics without error handling except for exceptions.
 
+    Raises ConnectionError when CryptoCompare returns nothing (rate limited or
+    unreachable) so that caches don't hold on to a transient failure.
+
     Args:
         selected_crypto_symbol (str): Cryptocurrency ticker symbol (e.g., 'BTC').
         period (int): Number of days for historical data.
+        sample_stride (int): Use every nth daily close for volatility (1 = every day).
 
     Returns:
         dict: Cryptocurrency statistics or error message.
     """
+    if sample_stride < 1:
+        raise ValueError("sample_stride must be at least 1")
+
+    # Imported here so the app starts without loading cryptocompare and its HTTP stack
+    import cryptocompare
+
     try:
         # Fetch historical data for the selected crypto from CryptoCompare
+        _cryptocompare_limiter.acquire()
         raw_data = cryptocompare.get_historical_price_day(
             selected_crypto_symbol,  # Ticker symbol (e.g., 'BTC')
             currency='USD',
@@ -23,32 +60,38 @@ def get_crypto_stats(selected_crypto_symbol, period=365):
             toTs=int(datetime.now().timestamp())
         )
 
-        # Convert the raw data to a DataFrame for easier handling
-        df = pd.DataFrame(raw_data)
+        # cryptocompare reports HTTP errors, including 429s, by returning None
+        if raw_data is None:
+            raise ConnectionError(f"No response from CryptoCompare for {selected_crypto_symbol}")
 
-        # Convert 'time' to datetime and set it as the index
-        df['time'] = pd.to_datetime(df['time'], unit='s', errors='coerce')
-        df.set_index('time', inplace=True)
+        # Only the daily closes feed the statistics, so read them straight into an array
+        closes = np.fromiter(
+            (np.nan if row.get('close') is None else row['close'] for row in raw_data),
+            dtype=np.float64,
+            count=len(raw_data)
+        )
 
-        # Drop any rows with missing data
-        df.dropna(subset=['close'], inplace=True)
+        # Drop any days with missing data
+        closes = closes[~np.isnan(closes)]
 
-        # Ensure the DataFrame has enough data to calculate statistics
-        if len(df) < 2:
+        # Ensure there is enough data to calculate statistics
+        if closes.size < 2 or closes.size <= sample_stride:
             return {"error": "Not enough data to calculate statistics"}
 
         # Calculate today's return and percentage change
-        current_price = df['close'].iloc[-1]
-        previous_price = df['close'].iloc[-2]
+        current_price = closes[-1]
+        previous_price = closes[-2]
         price_change_24h = (current_price - previous_price) / previous_price * 100
 
         # Calculate the annual return based on the first and last price of the period
-        start_price = df['close'].iloc[0]
+        start_price = closes[0]
         annual_return = (current_price - start_price) / start_price * 100
 
-        # Calculate annualized volatility (standard deviation of daily returns)
-        df['log_return'] = np.log(df['close'] / df['close'].shift(1))
-        volatility = df['log_return'].std() * (252 ** 0.5)  # Annualized volatility (252 trading days)
+        # Calculate annualized volatility (standard deviation of log returns over
+        # sample_stride-day steps, ending at the latest close)
+        sampled_closes = closes[(closes.size - 1) % sample_stride::sample_stride]
+        log_returns = np.diff(np.log(sampled_closes))
+        volatility = log_returns.std(ddof=1) * np.sqrt(252 / sample_stride)  # Annualized volatility (252 trading days)
 
         # Return the statistics as a dictionary
         stats = {
@@ -59,5 +102,7 @@ def get_crypto_stats(selected_crypto_symbol, period=365):
         }
         return stats
 
+    except ConnectionError:
+        raise
     except Exception as e:
         return {"error": f"Error fetching data for {selected_crypto_symbol}: {str(e)}"}
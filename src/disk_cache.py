@@ -0,0 +1,89 @@
+"""
+SQLite-backed memoization that survives app restarts.
+
+Used underneath the in-process st.cache_data caches: Streamlit serves repeat
+calls from memory, and after a restart or redeploy the first call is served
+from disk instead of re-downloading years of price history.
+"""
+import functools
+import hashlib
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import time
+from contextlib import closing
+
+logger = logging.getLogger(__name__)
+
+# Cached rows are unpickled, so the default lives in a directory only this
+# user can write to rather than the shared temp directory
+CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "black_scholes_calculator"
+)
+CACHE_DB_PATH = os.environ.get("BS_CALC_CACHE_DB") or os.path.join(CACHE_DIR, "cache.sqlite3")
+
+if CACHE_DB_PATH.startswith(CACHE_DIR + os.sep):
+    os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+
+def _connect():
+    conn = sqlite3.connect(CACHE_DB_PATH, timeout=5)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS cache "
+        "(key TEXT PRIMARY KEY, value BLOB, expires_at INTEGER)"
+    )
+    return conn
+
+def _make_key(func, args, kwargs):
+    """SHA256 of the function name and its arguments"""
+    payload = json.dumps(
+        {"func": f"{func.__module__}.{func.__qualname__}", "args": args, "kwargs": kwargs},
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def disk_memoize(ttl, cache_if=None):
+    """
+    Memoize a function's results in SQLite for ttl seconds.
+
+    Exceptions are never cached, and any SQLite error falls back to calling
+    the function directly so the cache can't take the app down. When given,
+    cache_if(result, *args, **kwargs) must return True for a result to be
+    stored, so partial or failed results are recomputed on the next call.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = _make_key(func, args, kwargs)
+            now = int(time.time())
+
+            try:
+                with closing(_connect()) as conn:
+                    row = conn.execute(
+                        "SELECT value FROM cache WHERE key = ? AND expires_at > ?", (key, now)
+                    ).fetchone()
+                if row is not None:
+                    return pickle.loads(row[0])
+            except Exception as e:
+                # Truncated or stale blobs fail to unpickle in many ways (EOFError,
+                # AttributeError, ModuleNotFoundError, ...); recompute instead
+                logger.warning(f"Disk cache read failed for {func.__name__}: {e}")
+
+            result = func(*args, **kwargs)
+            if cache_if is not None and not cache_if(result, *args, **kwargs):
+                return result
+
+            try:
+                with closing(_connect()) as conn, conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                        (key, pickle.dumps(result, protocol=5), now + ttl)
+                    )
+            except (sqlite3.Error, pickle.PicklingError) as e:
+                logger.warning(f"Disk cache write failed for {func.__name__}: {e}")
+
+            return result
+        return wrapper
+    return decorator
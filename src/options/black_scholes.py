@@ -1,5 +1,5 @@
 import math
-from scipy.stats import norm
+from scipy.special import ndtr
 
 def black_scholes(S, K, T, r, sigma, option_type="call"):
     """
@@ -9,9 +9,25 @@ def black_scholes(S, K, T, r, sigma, option_type="call"):
     d2 = d1 - sigma * math.sqrt(T)
 
     if option_type.lower() == "call":
-        price = S * norm.cdf(d1) - K * math.exp(-r * T) * norm.cdf(d2)
+        price = S * ndtr(d1) - K * math.exp(-r * T) * ndtr(d2)
     elif option_type.lower() == "put":
-        price = K * math.exp(-r * T) * norm.cdf(-d2) - S * norm.cdf(-d1)
+        price = K * math.exp(-r * T) * ndtr(-d2) - S * ndtr(-d1)
     else:
         raise ValueError("Invalid option type. Use 'call' or 'put'.")
     return price
+
+def black_scholes_pair(S, K, T, r, sigma):
+    """
+    Calculate both the call and put price of a European option in one pass,
+    sharing d1, d2 and the discount factor. The put uses N(-d1) and N(-d2)
+    rather than put-call parity, which cancels to tiny negative prices for
+    deep out-of-the-money puts.
+    """
+    sigma_sqrt_T = sigma * math.sqrt(T)
+    d1 = (math.log(S / K) + (r + (sigma ** 2) / 2) * T) / sigma_sqrt_T
+    d2 = d1 - sigma_sqrt_T
+
+    discounted_K = K * math.exp(-r * T)
+    call_price = S * ndtr(d1) - discounted_K * ndtr(d2)
+    put_price = discounted_K * ndtr(-d2) - S * ndtr(-d1)
+    return call_price, put_price
@@ -0,0 +1,24 @@
+"""
+Ahead-of-time compile the heatmap Black-Scholes kernel into options/bs_aot.*.so.
+
+Run once per deploy from the src directory:
+
+    python -m options.build_aot
+
+heatmap_generator imports the compiled module when it exists and falls back
+to JIT-compiling options.bs_numba otherwise. The AOT build is single-threaded
+since pycc does not support parallel=True.
+"""
+import os
+from numba.pycc import CC
+
+from options.bs_numba import bs_grid
+
+cc = CC("bs_aot")
+cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+cc.export(
+    "bs_grid", "void(f8[:], f8[:], f8, f8, f8, f8[:, :], f8[:, :])"
+)(bs_grid.py_func)
+
+if __name__ == "__main__":
+    cc.compile()
@@ -1,19 +1,26 @@
 import numpy as np
 import plotly.graph_objects as go
-from options.black_scholes import black_scholes
 
-def generate_heatmaps(S, K, T, r, min_S, max_S, min_sigma, max_sigma):
-        # Generate heatmap data
-    stock_prices = np.linspace(min_S, max_S, 10)
-    volatilities = np.linspace(min_sigma, max_sigma, 10)
+try:
+    # Ahead-of-time compiled kernel, produced by options/build_aot.py
+    from options.bs_aot import bs_grid as _bs_grid
+except ImportError:
+    # JIT fallback; cache=True reuses the compiled kernel across restarts
+    from options.bs_numba import bs_grid as _bs_grid
 
-    call_heatmap_data = np.zeros((10, 10))
-    put_heatmap_data = np.zeros((10, 10))
+def generate_heatmaps(S, K, T, r, stock_prices, volatilities, out_call=None, out_put=None):
+    """
+    Build call and put price heatmaps over the given stock price and volatility axes.
 
-    for i, S_val in enumerate(stock_prices):
-        for j, sigma_val in enumerate(volatilities):
-            call_heatmap_data[i, j] = black_scholes(S_val, K, T, r, sigma_val, "call")
-            put_heatmap_data[i, j] = black_scholes(S_val, K, T, r, sigma_val, "put")
+    out_call/out_put may be preallocated (len(stock_prices), len(volatilities))
+    arrays to write the prices into; Plotly copies them into the figures.
+    """
+    # Generate heatmap data
+    shape = (stock_prices.size, volatilities.size)
+    call_heatmap_data = np.empty(shape) if out_call is None else out_call
+    put_heatmap_data = np.empty(shape) if out_put is None else out_put
+    _bs_grid(stock_prices, volatilities, float(K), float(T), float(r),
+             call_heatmap_data, put_heatmap_data)
 
     # Create the Plotly heatmap for Call options
     call_heatmap_fig = go.Figure(data=go.Heatmap(
@@ -60,14 +67,16 @@ def generate_heatmaps(S, K, T, r, min_S, max_S, min_sigma, max_sigma):
         title="Call Option Price Heatmap",
         xaxis_title="Volatility (σ)",
         yaxis_title="Stock Price (S)",
-        height=500
+        height=500,
+        uirevision="call_heatmap"  # Keep zoom/pan when the figure is replaced on rerun
     )
 
     put_heatmap_fig.update_layout(
         title="Put Option Price Heatmap",
         xaxis_title="Volatility (σ)",
         yaxis_title="Stock Price (S)",
-        height=500
+        height=500,
+        uirevision="put_heatmap"  # Keep zoom/pan when the figure is replaced on rerun
     )
 
     return {"call": call_heatmap_fig, "put": put_heatmap_fig}
@@ -0,0 +1,156 @@
+"""
+Two-tier cache for live stock quotes with explicit invalidation.
+
+Quotes are held in memory for TTL_INTRADAY seconds and in SQLite until they
+can next change: a minute during market hours and the closing auction, the
+next open otherwise.
+invalidate() lets a user-triggered refresh drop both tiers at once.
+"""
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime, timedelta, time as dt_time
+from zoneinfo import ZoneInfo
+
+from cachetools import TTLCache
+
+from cache_ttl import TTL_INTRADAY
+from disk_cache import CACHE_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_OPEN = dt_time(9, 30)
+
+# Closing auction prints land shortly after the 16:00 bell, so quotes keep the
+# intraday TTL until then rather than pinning a pre-auction price overnight
+CLOSING_AUCTION_END = dt_time(16, 15)
+
+_memory = TTLCache(maxsize=5000, ttl=TTL_INTRADAY)
+_memory_lock = threading.Lock()
+
+# Bound on ? placeholders per query, under SQLite's default variable limit
+SQL_BATCH_SIZE = 500
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+def _connect():
+    """Open a connection; WAL mode and the prices table are set up once per process"""
+    global _schema_ready
+    conn = sqlite3.connect(CACHE_DB_PATH, timeout=5)
+    if not _schema_ready:
+        with _schema_lock:
+            if not _schema_ready:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS prices "
+                    "(ticker TEXT PRIMARY KEY, price REAL, expires_at REAL)"
+                )
+                _schema_ready = True
+    return conn
+
+def seconds_until_open(now=None):
+    """Seconds from now until the next regular-session open (weekends skipped, holidays not)"""
+    now = now or datetime.now(MARKET_TZ)
+    next_open = datetime.combine(now.date(), MARKET_OPEN, tzinfo=MARKET_TZ)
+    if now >= next_open:
+        next_open += timedelta(days=1)
+    while next_open.weekday() >= 5:
+        next_open += timedelta(days=1)
+    return (next_open - now).total_seconds()
+
+def price_ttl(now=None):
+    """How long a quote fetched now stays valid: TTL_INTRADAY until the closing auction settles"""
+    now = now or datetime.now(MARKET_TZ)
+    if now.weekday() < 5 and MARKET_OPEN <= now.time() < CLOSING_AUCTION_END:
+        return TTL_INTRADAY
+    return seconds_until_open(now)
+
+def get_many(tickers):
+    """
+    Cached prices for tickers as a {ticker: price} dict; misses in both tiers are left out.
+
+    Memory misses are looked up with one SQLite query per SQL_BATCH_SIZE tickers.
+    """
+    found = {}
+    with _memory_lock:
+        for ticker in tickers:
+            price = _memory.get(ticker)
+            if price is not None:
+                found[ticker] = price
+
+    missing = [ticker for ticker in dict.fromkeys(tickers) if ticker not in found]
+    if not missing:
+        return found
+
+    try:
+        now = time.time()
+        rows = []
+        with closing(_connect()) as conn:
+            for start in range(0, len(missing), SQL_BATCH_SIZE):
+                batch = missing[start:start + SQL_BATCH_SIZE]
+                placeholders = ", ".join("?" * len(batch))
+                rows += conn.execute(
+                    f"SELECT ticker, price FROM prices WHERE ticker IN ({placeholders}) AND expires_at > ?",
+                    (*batch, now)
+                ).fetchall()
+    except sqlite3.Error as e:
+        logger.warning(f"Price cache read failed for {', '.join(missing)}: {e}")
+        return found
+
+    with _memory_lock:
+        for ticker, price in rows:
+            _memory[ticker] = price
+            found[ticker] = price
+    return found
+
+def get(ticker):
+    """
+    Cached price for ticker, or None on a miss in both tiers.
+    """
+    return get_many((ticker,)).get(ticker)
+
+def put_many(prices):
+    """
+    Store freshly fetched {ticker: price} quotes in both tiers in one transaction.
+    """
+    with _memory_lock:
+        _memory.update(prices)
+
+    try:
+        expires_at = time.time() + price_ttl()
+        with closing(_connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO prices (ticker, price, expires_at) VALUES (?, ?, ?)",
+                [(ticker, price, expires_at) for ticker, price in prices.items()]
+            )
+    except sqlite3.Error as e:
+        logger.warning(f"Price cache write failed for {', '.join(prices)}: {e}")
+
+def put(ticker, price):
+    """
+    Store a freshly fetched price in both tiers.
+    """
+    put_many({ticker: price})
+
+def invalidate(ticker=None):
+    """
+    Drop ticker from both tiers, or every cached price when ticker is None.
+    """
+    with _memory_lock:
+        if ticker is None:
+            _memory.clear()
+        else:
+            _memory.pop(ticker, None)
+
+    try:
+        with closing(_connect()) as conn, conn:
+            if ticker is None:
+                conn.execute("DELETE FROM prices")
+            else:
+                conn.execute("DELETE FROM prices WHERE ticker = ?", (ticker,))
+    except sqlite3.Error as e:
+        logger.warning(f"Price cache invalidation failed for {ticker or 'all tickers'}: {e}")
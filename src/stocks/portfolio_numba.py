@@ -0,0 +1,49 @@
+import math
+import numpy as np
+from numba import njit, prange
+
+TRADING_DAYS = 252
+
+# fastmath without the no-NaN/no-Inf assumptions: a flat price series must
+# still produce the same NaN/inf statistics as the NumPy path
+_FASTMATH_FLAGS = {"nsz", "arcp", "contract", "afn", "reassoc"}
+
+@njit(parallel=True, fastmath=_FASTMATH_FLAGS, error_model="numpy", cache=True)
+def portfolio_kernel(R, w, risk_free_rate):
+    """
+    Annualized portfolio statistics from a (days, stocks) matrix of daily returns.
+
+    R may be float32 to halve memory traffic; means are accumulated and the
+    covariance is returned in float64 either way.
+
+    Returns (expected_return, volatility, sharpe_ratio, stock_returns, stock_volatilities).
+    """
+    n_obs, n_stocks = R.shape
+
+    # Per-stock means and the centered returns, stored stock-major so each
+    # thread writes one contiguous row
+    means = np.empty(n_stocks)
+    centered_T = np.empty((n_stocks, n_obs), dtype=R.dtype)
+    for j in prange(n_stocks):
+        total = 0.0
+        for t in range(n_obs):
+            total += R[t, j]
+        mean = total / n_obs
+        means[j] = mean
+        for t in range(n_obs):
+            centered_T[j, t] = R[t, j] - mean
+
+    # Sample covariance Rc^T Rc / (T - 1) as a single BLAS matrix product
+    covariance = np.dot(centered_T, centered_T.T).astype(np.float64) * (TRADING_DAYS / (n_obs - 1))
+
+    stock_returns = means * TRADING_DAYS
+    stock_volatilities = np.empty(n_stocks)
+    for j in prange(n_stocks):
+        stock_volatilities[j] = math.sqrt(covariance[j, j])
+
+    # w . mu and sqrt(w^T * cov * w)
+    expected_return = np.dot(w, stock_returns)
+    volatility = math.sqrt(np.dot(w, np.dot(covariance, w)))
+    sharpe_ratio = (expected_return - risk_free_rate) / volatility
+
+    return expected_return, volatility, sharpe_ratio, stock_returns, stock_volatilities
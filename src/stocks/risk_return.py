@@ -1,72 +1,115 @@
-import yfinance as yf
 import numpy as np
-import pandas as pd
 import logging
-from stocks.volatility_fetcher import fetch_volatility as fv
+import threading
+from cachetools import TTLCache, cached
+from cache_ttl import TTL_DAILY_CLOSE
+from disk_cache import disk_memoize
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def calculate_correlation(tickers, period="1y"):
+# Portfolios wider than this compute returns statistics in float32, halving
+# the memory traffic of the covariance product; smaller ones keep float64
+FLOAT32_MIN_TICKERS = 50
+
+def _is_complete_panel(price_panel, tickers, period="1y"):
+    """True when every requested ticker has at least one price in the panel."""
+    return all(
+        ticker in price_panel.columns and price_panel[ticker].notna().any()
+        for ticker in tickers
+    )
+
+def fetch_price_panel(tickers, period="1y"):
     """
-    Calculate the correlation coefficient between a list of stock tickers over a specified period.
+    Download the daily adjusted close prices for a list of stock tickers.
+
+    With auto_adjust=True the 'Close' column is already adjusted.
 
     Args:
     tickers (list): A list of stock tickers (e.g., ['AAPL', 'GOOGL', 'AMZN']).
     period (str): The period to retrieve the data for, default is "1y" (1 year).
 
     Returns:
-    pd.DataFrame: A correlation matrix of stock returns.
+    pd.DataFrame: Adjusted close prices, one column per ticker.
+
+    yfinance reports failed downloads as empty frames or all-NaN columns rather
+    than raising. An empty result raises ValueError, and a panel missing any
+    ticker is returned but not written to the disk cache.
     """
-    # Fetch historical data for the given tickers
-    stock_data = yf.download(tickers, period=period)['Adj Close']
-    
+    # Sorted and deduplicated so every ordering of a portfolio shares one disk cache entry
+    return _download_price_panel(tuple(sorted(set(tickers))), period)
+
+@disk_memoize(ttl=TTL_DAILY_CLOSE, cache_if=_is_complete_panel)
+def _download_price_panel(tickers, period):
+    import yfinance as yf
+
+    price_panel = yf.download(
+        list(tickers), period=period, threads=True, progress=False, auto_adjust=True, group_by='column'
+    )['Close']
+    if price_panel.empty or price_panel.isna().all().all():
+        raise ValueError(f"Could not retrieve data for {', '.join(tickers)}")
+    return price_panel
+
+@cached(TTLCache(maxsize=128, ttl=TTL_DAILY_CLOSE), lock=threading.Lock())
+def _compute_corr(tickers, period):
+    """
+    Download prices for a frozenset of tickers and compute their correlation matrix.
+
+    Keyed on a frozenset so every ordering of the same tickers shares one entry;
+    entries expire with the daily close like the price download underneath.
+    Returns the column tickers and a read-only matrix in that (sorted) order.
+    """
+    stock_data = fetch_price_panel(tickers, period)
+    correlation_matrix = _returns_correlation(stock_data, tickers)
+
+    matrix = correlation_matrix.to_numpy()
+    matrix.flags.writeable = False
+    return tuple(correlation_matrix.columns), matrix
+
+def _returns_correlation(stock_data, tickers):
+    """Correlation matrix of the daily returns of a price DataFrame."""
     # Ensure that the data is not empty
     if stock_data.empty:
         raise ValueError(f"Could not retrieve data for {', '.join(tickers)}")
 
     # Calculate daily returns for each stock
-    daily_returns = stock_data.pct_change().dropna()
+    daily_returns = stock_data.pct_change(fill_method=None).dropna()
 
     # Calculate the correlation matrix for the daily returns
-    correlation_matrix = daily_returns.corr()
+    return daily_returns.corr()
 
-    return correlation_matrix
-
-def calculate_portfolio_variance(portfolio_weights, annual_volatilities, correlation_matrix):
+def calculate_correlation(tickers, period="1y", *, price_panel=None):
     """
-    Calculate the variance of a portfolio given the weights, volatilities, and correlation matrix.
+    Calculate the correlation coefficient between a list of stock tickers over a specified period.
 
     Args:
-    portfolio_weights (numpy.array): Array of weights of the stocks in the portfolio.
-    annual_volatilities (numpy.array): Array of annual volatilities (standard deviations) of the stocks.
-    correlation_matrix (pandas.DataFrame): Correlation matrix of stock returns.
+    tickers (list): A list of stock tickers (e.g., ['AAPL', 'GOOGL', 'AMZN']).
+    period (str): The period to retrieve the data for, default is "1y" (1 year).
+    price_panel (pd.DataFrame): Already downloaded prices for tickers; fetched when None.
 
     Returns:
-    float: Portfolio variance.
+    pd.DataFrame: A correlation matrix of stock returns.
     """
+    # Already downloaded prices only need the correlation itself, over the requested tickers
+    if price_panel is not None:
+        columns = [ticker for ticker in dict.fromkeys(tickers) if ticker in price_panel.columns]
+        return _returns_correlation(price_panel[columns], tickers)
 
-    portfolio_weights = np.array(portfolio_weights)
-    annual_volatilities = np.array(annual_volatilities)
-    correlation_matrix = np.array(correlation_matrix)
-    # Convert correlation matrix to a covariance matrix
-    # Calculate the covariance matrix using the volatilities and correlation matrix
-    cov_matrix = correlation_matrix * np.outer(annual_volatilities, annual_volatilities)
-
-    # Calculate portfolio variance using the formula: w^T * covariance_matrix * w
-    portfolio_variance = np.dot(portfolio_weights.T, np.dot(cov_matrix, portfolio_weights))
-
-    return np.sqrt(portfolio_variance)
+    import pandas as pd
 
+    # Reuse the matrix computed for any earlier ordering of the same tickers
+    columns, matrix = _compute_corr(frozenset(tickers), period)
+    return pd.DataFrame(matrix.copy(), index=columns, columns=columns)
 
-def calculate_portfolio_metrics(portfolio_tuples, period, risk_free_rate=0.05):
+def calculate_portfolio_metrics(portfolio_tuples, period, risk_free_rate=0.05, *, price_panel=None):
     """
     Calculate portfolio risk and expected return.
     
     Args:
     portfolio_tuples (list): List of tuples with (stock_ticker, number_of_shares, current_price)
     risk_free_rate (float): Annual risk-free rate (default 5%)
+    price_panel (pd.DataFrame): Already downloaded prices for the tickers; fetched when None.
     
     Returns:
     dict: Portfolio metrics including total risk, expected return, and individual stock details
@@ -78,50 +121,60 @@ def calculate_portfolio_metrics(portfolio_tuples, period, risk_free_rate=0.05):
     # Prepare data structures
     stock_tickers = [ticker for ticker, _, _ in portfolio_tuples]
     
-    # Calculate total portfolio value
-    total_portfolio_value = sum([shares * price for _, shares, price in portfolio_tuples])
+    n_stocks = len(portfolio_tuples)
+    share_counts = np.fromiter((shares for _, shares, _ in portfolio_tuples), dtype=np.float64, count=n_stocks)
+    current_prices = np.fromiter((price for _, _, price in portfolio_tuples), dtype=np.float64, count=n_stocks)
+
+    # Calculate total portfolio value and per-stock weights in one pass
+    stock_values = share_counts * current_prices
+    total_portfolio_value = stock_values.sum()
+    weights = stock_values / total_portfolio_value
     
-    # Download historical stock data
-    try:
-        stock_data = yf.download(stock_tickers, period=period)['Adj Close']
-        logger.info(f"Successfully downloaded data for {stock_tickers}")
-    except Exception as e:
-        logger.error(f"Error downloading stock data: {e}")
-        raise ValueError(f"Error downloading stock data: {e}")
+    # Download historical stock data unless the caller already has it
+    if price_panel is not None:
+        stock_data = price_panel
+    else:
+        try:
+            stock_data = fetch_price_panel(stock_tickers, period)
+            logger.info(f"Successfully downloaded data for {stock_tickers}")
+        except Exception as e:
+            logger.error(f"Error downloading stock data: {e}")
+            raise ValueError(f"Error downloading stock data: {e}")
     
     # Ensure data is present for all stocks
     if stock_data.empty:
         raise ValueError("No stock data could be retrieved. Check stock tickers.")
     
     # Calculate returns
-    returns = stock_data.pct_change().dropna()
+    returns = stock_data.pct_change(fill_method=None).dropna()
     
-    # Individual stock analysis
-    stock_details = {}
-    portfolio_weights = []
-    expected_returns = []
-    annual_volatilities = []
-    
-    for ticker, shares, current_price in portfolio_tuples:
-        # Skip if data is insufficient
-        if ticker not in returns.columns:
-            logger.warning(f"No data available for {ticker}")
-            continue
-        
-        # Calculate individual stock metrics
-        stock_returns = returns[ticker]
-        avg_annual_return = stock_returns.mean() * 252  # Annualized return
-        annual_volatility = fv(ticker, period=period)
-        
-        # Calculate portfolio weight
-        stock_value = shares * current_price
-        weight = stock_value / total_portfolio_value
-        portfolio_weights.append(weight)
-        expected_returns.append(avg_annual_return)
-        annual_volatilities.append(annual_volatility)
-        
-        # Store stock details
-        stock_details[ticker] = {
+    # Keep the tickers that have return data, in portfolio order
+    available = np.array([ticker in returns.columns for ticker in stock_tickers])
+    for ticker in np.array(stock_tickers)[~available]:
+        logger.warning(f"No data available for {ticker}")
+
+    # Validate calculations
+    if not available.any():
+        raise ValueError("Unable to calculate metrics for any stocks in the portfolio")
+    available_tickers = [ticker for ticker, ok in zip(stock_tickers, available) if ok]
+
+    # Annualized statistics from the compiled kernel over the returns matrix
+    from stocks.portfolio_numba import portfolio_kernel
+
+    returns_dtype = np.float32 if len(available_tickers) > FLOAT32_MIN_TICKERS else np.float64
+    returns_matrix = returns[available_tickers].to_numpy(dtype=returns_dtype)
+    portfolio_weights = np.ascontiguousarray(weights[available])
+    (
+        portfolio_expected_return,
+        portfolio_volatility,
+        sharpe_ratio,
+        expected_returns,
+        annual_volatilities,
+    ) = portfolio_kernel(returns_matrix, portfolio_weights, risk_free_rate)
+
+    # Individual stock details
+    stock_details = {
+        ticker: {
             'shares': shares,
             'current_price': current_price,
             'total_value': stock_value,
@@ -129,21 +182,16 @@ def calculate_portfolio_metrics(portfolio_tuples, period, risk_free_rate=0.05):
             'annual_volatility': annual_volatility,
             'weight': weight
         }
-    
-    # Validate calculations
-    if not stock_details:
-        raise ValueError("Unable to calculate metrics for any stocks in the portfolio")
-    
-    # Portfolio expected return (weighted average of individual returns)
-    portfolio_expected_return = np.dot(portfolio_weights, expected_returns)
-    
-    # Portfolio variance calculation (including covariance)
-    correlation_matrix = calculate_correlation(stock_tickers,period=period)
-
-    portfolio_volatility = calculate_portfolio_variance(portfolio_weights, annual_volatilities, correlation_matrix)
-    
-    # Sharpe Ratio calculation
-    sharpe_ratio = (portfolio_expected_return - risk_free_rate) / portfolio_volatility
+        for ticker, shares, current_price, stock_value, avg_annual_return, annual_volatility, weight in zip(
+            available_tickers,
+            share_counts[available],
+            current_prices[available],
+            stock_values[available],
+            expected_returns,
+            annual_volatilities,
+            portfolio_weights
+        )
+    }
     
     return {
         'total_portfolio_value': total_portfolio_value,
@@ -1,5 +1,4 @@
 import streamlit as st
-import yfinance as yf
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -49,6 +48,8 @@ def monitor_stock(to_email, stock_symbol, price_point, comparison_mode):
         price_point (float): Price threshold.
         comparison_mode (int): 1 for greater-than check, 0 for less-than check.
     """
+    import yfinance as yf
+
     try:
         # Fetch real-time stock data
         stock = yf.Ticker(stock_symbol)
@@ -1,12 +1,20 @@
-import yfinance as yf
 import numpy as np
 
 def fetch_volatility(ticker, period="1y"):
     """
     Fetch volatility (standard deviation of returns) for a stock using yfinance.
     """
+    import yfinance as yf
+
     stock = yf.Ticker(ticker)
     df = stock.history(period=period)
-    df['log_return'] = np.log(df['Close'] / df['Close'].shift(1))
-    volatility = df['log_return'].std() * np.sqrt(252)  # Annualized volatility (252 trading days in a year)
+
+    # Only the closes are used, so work on the positional array instead of the dated Series
+    closes = df['Close'].to_numpy(dtype=np.float64)
+    closes = closes[~np.isnan(closes)]
+    if closes.size < 2:
+        raise ValueError(f"Not enough price history for {ticker}")
+
+    log_returns = np.diff(np.log(closes))
+    volatility = log_returns.std(ddof=1) * np.sqrt(252)  # Annualized volatility (252 trading days in a year)
     return volatility